@@ -0,0 +1,283 @@
+"""
+Regression check: the NumPy/Numba kernels of intraday_strategy_backtest.py against the pandas
+formulations and the per-bar trade loop they replace, on random gappy multi-symbol minute data
+(missing minutes, unaligned first bars, NaN gaps). Every comparison is exact, not allclose.
+
+    python3 check_kernels.py [n_seeds]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+import intraday_strategy_backtest as bt
+
+# ===============================
+# RANDOM DATA
+# ===============================
+def make_day(rng, n_symbols=6):
+    """
+    One day of 1-minute bars, sorted by (symbol, time). Each symbol may start a few minutes
+    late and misses a random share of its minutes; prices sit on the 0.05 tick.
+    """
+    blocks = []
+    for s in range(n_symbols):
+        start = pd.Timestamp("2025-08-01 09:15") + pd.Timedelta(minutes=int(rng.integers(0, 4)))
+        ts = pd.date_range(start, "2025-08-01 15:29", freq="1min")
+        keep = rng.random(len(ts)) > rng.choice([0.0, 0.05, 0.3])
+        keep[0] = True
+        ts = ts[keep]
+        close = rng.uniform(50, 3000) * np.exp(np.cumsum(rng.normal(0, 0.003, len(ts))))
+        low = close * (1 - np.abs(rng.normal(0, 0.002, len(ts))))
+        high = close * (1 + np.abs(rng.normal(0, 0.002, len(ts))))
+        tick = lambda x: np.round(np.round(x / 0.05) * 0.05, 2)
+        blocks.append(pd.DataFrame({"symbol": s, "time": ts, "high": tick(high), "low": tick(low), "close": tick(close)}))
+    return pd.concat(blocks, ignore_index=True)
+
+def make_selection_days(rng, n_days=3, n_symbols=14):
+    """
+    Raw (ticker-named) 1-minute bars around the 09:15 - 09:25 selection window for a few days.
+    Each day trades a random subset of the universe (possibly none, or fewer than the top n),
+    some symbols only start after the window, some have zero volume, some copy another
+    symbol's bars under their own name (exact turnover ties) and some rows have no ticker.
+    """
+    blocks = []
+    for day in pd.date_range("2025-08-01", periods=n_days, freq="B"):
+        present = rng.permutation(n_symbols)[:rng.integers(0, n_symbols + 1)]
+        day_blocks = []
+        for s in sorted(present):
+            start = day + pd.Timedelta(minutes=int(rng.choice([550, 555, 558, 566])))   # 09:10 .. 09:26
+            ts = pd.date_range(start, day + pd.Timedelta(minutes=575), freq="1min")
+            ts = ts[rng.random(len(ts)) > 0.2]
+            close = np.round(np.round(rng.uniform(50, 3000) / 0.05) * 0.05, 2) + np.zeros(len(ts))
+            volume = rng.integers(0, 3, len(ts)) * rng.integers(0, 50000) if rng.random() < 0.8 else np.zeros(len(ts), dtype=np.int64)
+            bars = pd.DataFrame({"ticker": f"S{s:02d}", "time": ts, "close": close, "volume": volume})
+            if day_blocks and rng.random() < 0.2:
+                bars = day_blocks[-1].assign(ticker=f"S{s:02d}")   # Same turnover as the previous symbol
+            day_blocks.append(bars)
+        missing = pd.DataFrame({
+            "ticker": None, "time": day + pd.Timedelta(minutes=556) + pd.to_timedelta(rng.integers(0, 10, 5), "min"),
+            "close": 999.95, "volume": 10**6,
+        })
+        blocks.extend(day_blocks + [missing])
+    raw = pd.concat(blocks, ignore_index=True)
+    raw["ticker"] = raw["ticker"].astype("str")   # None stays a missing value
+    return raw.assign(open=raw["close"], high=raw["close"], low=raw["close"])
+
+def with_nans(rng, values, share=0.05):
+    values = values.copy()
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+def assert_same(name, got, expected):
+    got, expected = np.asarray(got), np.asarray(expected)
+    if got.shape != expected.shape or not np.array_equal(got, expected, equal_nan=expected.dtype.kind == "f"):
+        raise AssertionError(f"{name}: output differs from the reference")
+
+# ===============================
+# CHECKS
+# ===============================
+def check_indicators(rng, day):
+    """
+    _ema_njit / _rsi_wilder_njit, called with the _symbol_offsets blocks as in process_day,
+    against grouped ewm(adjust=False) and the original diff/where + ewm RSI. EMA input gets
+    NaN gaps; span 3 is pandas' com == 1 special case.
+    """
+    _, offsets = bt._symbol_offsets(day["symbol"].to_numpy())
+    close = pd.Series(day["close"].to_numpy(), index=pd.Index(day["symbol"].to_numpy(), name="symbol"))
+    gappy = pd.Series(with_nans(rng, close.to_numpy()), index=close.index)
+    expected, single = {}, {}
+    for span in (2, 3, 10, 50):
+        expected[span] = gappy.groupby(level="symbol").transform(lambda x: x.ewm(span=span, adjust=False).mean())
+        single[span] = bt._ema_njit(gappy.to_numpy(), offsets, np.array([float(span)]))[:, 0]
+        assert_same(f"ema({span})", single[span], expected[span])
+
+    # The fused EMA3/EMA10 pass of process_day: per-span state side by side, span 3 on the
+    # com == 1 branch next to span 10
+    fused = bt._ema_njit(gappy.to_numpy(), offsets, np.array([3.0, 10.0]))
+    for s, span in enumerate((3, 10)):
+        assert_same(f"fused ema({span})", fused[:, s], expected[span])
+        assert_same(f"fused ema({span}) vs single span", fused[:, s], single[span])
+
+    def rsi_pandas(x, period=14):
+        delta = x.diff()
+        gain = delta.where(delta > 0, 0.0)
+        loss = -delta.where(delta < 0, 0.0)
+        avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    expected = close.groupby(level="symbol").transform(rsi_pandas)
+    assert_same("rsi_wilder(14)", bt._rsi_wilder_njit(close.to_numpy(), offsets, 14), expected)
+
+def check_resample(day):
+    """
+    _resample_bins() against resample(origin="start", closed="right", label="right"): 10min bars
+    from the 1-minute data, and 1h bars built from the 10min labels as process_day does.
+    """
+    ts_ns = bt._ts_ns(day["time"])
+    _, offsets = bt._symbol_offsets(day["symbol"].to_numpy())
+    close = day["close"].to_numpy()
+    m10_ts, m10_start = bt._resample_bins(ts_ns, offsets, bt.TEN_MIN_NS)
+    m10_high = np.maximum.reduceat(day["high"].to_numpy(), m10_start)
+    m10_close = close[np.append(m10_start[1:], len(ts_ns)) - 1]
+    m10_symbols = day["symbol"].to_numpy()[m10_start]
+    _, m10_offsets = bt._symbol_offsets(m10_symbols)
+    h1_ts, h1_start = bt._resample_bins(m10_ts, m10_offsets, bt.ONE_HOUR_NS)
+    h1_close = m10_close[np.append(h1_start[1:], len(m10_close)) - 1]
+
+    def bars(freq):
+        return (
+            day.set_index("time").groupby("symbol")[["high", "close"]]
+            .resample(freq, origin="start", closed="right", label="right")
+            .agg(high=("high", "max"), close=("close", "last")).dropna()
+        )
+
+    m10 = bars("10min")
+    assert_same("10min labels", m10_ts, bt._ts_ns(m10.index.get_level_values("time")))
+    assert_same("10min high", m10_high, m10["high"])
+    assert_same("10min close", m10_close, m10["close"])
+    h1 = bars("1h")
+    assert_same("1h labels", h1_ts, bt._ts_ns(h1.index.get_level_values("time")))
+    assert_same("1h close", h1_close, h1["close"])
+
+def check_rolling_min(rng, day):
+    """
+    _rolling_min_before() against rolling("5min", closed="left").min(), with NaN lows.
+    """
+    ts_ns = bt._ts_ns(day["time"])
+    _, offsets = bt._symbol_offsets(day["symbol"].to_numpy())
+    low = with_nans(rng, day["low"].to_numpy())
+    expected = (
+        pd.Series(low, index=day["time"]).groupby(day["symbol"].to_numpy())
+        .rolling("5min", closed="left").min()
+    )
+    assert_same("5min rolling min", bt._rolling_min_before(ts_ns, low, offsets, bt.FIVE_MIN_NS), expected)
+
+def simulate_trade_reference(high, low, close, fill_idx, direction, ep):
+    """
+    The original per-bar trade loop: exit check first (stop wins over target), then the
+    extreme/activation/trailing update; square-off at the last close.
+    """
+    long = direction == bt.LONG
+    sl = ep * (1 - bt.STOP_LOSS_PCT) if long else ep * (1 + bt.STOP_LOSS_PCT)
+    tgt = ep * (1 + bt.TARGET_PCT) if long else ep * (1 - bt.TARGET_PCT)
+    trail_active = False
+    extreme = ep
+    for j in range(fill_idx, len(high)):
+        if (low[j] <= sl) if long else (high[j] >= sl):
+            return j, sl, bt.EXIT_TRAIL if trail_active else bt.EXIT_SL
+        if (high[j] >= tgt) if long else (low[j] <= tgt):
+            return j, tgt, bt.EXIT_TARGET
+        if long:
+            extreme = max(extreme, high[j])
+            if not trail_active and extreme >= ep * (1 + bt.TRAIL_TRIGGER):
+                trail_active = True
+            if trail_active:
+                sl = max(sl, extreme * (1 - bt.TRAIL_STEP))
+        else:
+            extreme = min(extreme, low[j])
+            if not trail_active and extreme <= ep * (1 - bt.TRAIL_TRIGGER):
+                trail_active = True
+            if trail_active:
+                sl = min(sl, extreme * (1 + bt.TRAIL_STEP))
+    return len(high) - 1, close[-1], bt.EXIT_EOD
+
+def check_simulate_trade(rng, n_trades=300):
+    """
+    _simulate_trade() (two-phase exit search, bit-folded trailing loop) against the original
+    per-bar loop on random 1-minute paths: both directions, fill anywhere in the path (last bar
+    included) and some bars touching the stop or target exactly. Returns the exit reason counts.
+    """
+    reasons = np.zeros(len(bt.EXIT_REASONS), dtype=np.int64)
+    for _ in range(n_trades):
+        n = int(rng.integers(1, 400))
+        tick = lambda x: np.round(np.round(x / 0.05) * 0.05, 2)
+        close = rng.uniform(50, 3000) * np.exp(np.cumsum(rng.normal(rng.normal(0, 0.0005), rng.choice([0.001, 0.003]), n)))
+        high = tick(close * (1 + np.abs(rng.normal(0, 0.002, n))))
+        low = tick(close * (1 - np.abs(rng.normal(0, 0.002, n))))
+        close = np.clip(tick(close), low, high)
+        fill_idx = int(rng.integers(0, n))
+        direction = bt.LONG if rng.random() < 0.5 else bt.SHORT
+        ep = tick(rng.uniform(low[fill_idx], high[fill_idx]))
+        if rng.random() < 0.3:
+            # One bar touches the static stop and one the target exactly: the <= / >= edges
+            j, k = rng.integers(fill_idx, n, 2)
+            if direction == bt.LONG:
+                sl, tgt = ep * (1 - bt.STOP_LOSS_PCT), ep * (1 + bt.TARGET_PCT)
+                low[j], high[j] = sl, max(high[j], sl)
+                low[k], high[k] = min(low[k], tgt), tgt
+            else:
+                sl, tgt = ep * (1 + bt.STOP_LOSS_PCT), ep * (1 - bt.TARGET_PCT)
+                low[j], high[j] = min(low[j], sl), sl
+                low[k], high[k] = tgt, max(high[k], tgt)
+
+        expected = simulate_trade_reference(high, low, close, fill_idx, direction, ep)
+        got = bt._simulate_trade(
+            high, low, close, fill_idx, direction, ep,
+            bt.STOP_LOSS_PCT, bt.TARGET_PCT, bt.TRAIL_TRIGGER, bt.TRAIL_STEP,
+        )
+        if tuple(got) != expected:
+            raise AssertionError(f"_simulate_trade: {tuple(got)} != reference {expected}")
+        reasons[expected[2]] += 1
+    return reasons
+
+def check_top_turnover(rng, n=10):
+    """
+    top_turnover_by_day() on compacted, category-coded data (as in main) against the original
+    per-day between_time -> groupby("symbol").sum() -> top n on the raw ticker names. Covers
+    missing tickers, days with fewer than n (or no) traded symbols and exact turnover ties.
+    """
+    raw = make_selection_days(rng)
+    data = bt.compact_dtypes(raw.copy()).rename(columns={"ticker": "symbol"})
+    universe = data["symbol"].cat.categories.to_numpy()
+    data["symbol"] = data["symbol"].cat.codes.astype(np.int32)
+    top = bt.top_turnover_by_day(data, n)
+
+    for day, day_df in raw.groupby(raw["time"].dt.date):
+        window = day_df.set_index("time").between_time("09:15", "09:25")
+        # A stable sort pins exact ties to the first symbol (nlargest keep="first"); the
+        # original default quicksort left their order unspecified
+        expected = (
+            window.assign(turnover=lambda x: x["close"] * x["volume"])
+            .groupby("ticker")["turnover"].sum()
+            .sort_values(ascending=False, kind="stable")
+            .head(n)
+        )
+        got = universe[top.get(day, [])].tolist()
+        if got != expected.index.tolist():
+            raise AssertionError(f"top_turnover_by_day {day}: {got} != reference {expected.index.tolist()}")
+
+def check_compact_dtypes(rng, day):
+    """
+    compact_dtypes() + restore_prices() give the exact float64 prices back: tick data is stored
+    as float32, off-tick data stays float64 and is not rounded.
+    """
+    for decimals in (2, 3):
+        raw = day.rename(columns={"symbol": "ticker"}).assign(
+            open=day["close"], volume=rng.integers(1, 50000, len(day))
+        )
+        raw[bt.PRICE_COLS] = raw[bt.PRICE_COLS].round(2) + (rng.integers(0, 10, (len(raw), 4)) / 1000 if decimals == 3 else 0)
+        expected = raw[bt.PRICE_COLS].to_numpy(np.float64)
+        compact = bt.compact_dtypes(raw.copy())
+        assert compact["close"].dtype == (np.float32 if decimals == 2 else np.float64)
+        assert_same(f"{decimals}-decimal prices", bt.restore_prices(compact[bt.PRICE_COLS].to_numpy()), expected)
+
+# ===============================
+# MAIN
+# ===============================
+if __name__ == "__main__":
+    n_seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    reasons = np.zeros(len(bt.EXIT_REASONS), dtype=np.int64)
+    for seed in range(n_seeds):
+        rng = np.random.default_rng(seed)
+        day = make_day(rng)
+        check_indicators(rng, day)
+        check_resample(day)
+        check_rolling_min(rng, day)
+        reasons += check_simulate_trade(rng)
+        check_top_turnover(rng)
+        check_compact_dtypes(rng, day)
+    # Every exit path of the trade loop must actually have been compared
+    assert (reasons > 0).all(), dict(zip(bt.EXIT_REASONS, reasons))
+    print(f"All kernel checks passed ({n_seeds} seeds).")
@@ -1,7 +1,24 @@
 import pandas as pd
 import numpy as np
 import glob
-from datetime import timedelta, time
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: fall back to plain Python with the same call signature.
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+try:
+    import pyarrow.csv as pa_csv  # Optional: Arrow CSV reader + Parquet cache
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 # ===============================
 # CONFIG
@@ -13,283 +30,712 @@ TARGET_PCT = 0.02               # 2%
 TRAIL_TRIGGER = 0.005           # +0.5% (Activation)
 TRAIL_STEP = 0.0075             # 0.75% (Trailing Distance)
 
-DATA_FILES = glob.glob("data/dataNSE_*.csv")
+PRICE_COLS = ["open", "high", "low", "close"]
+PRICE_DECIMALS = 2              # NSE quotes are 2-decimal ticks
+
+# All time arithmetic is on int64 nanoseconds
+ONE_MIN_NS = 60_000_000_000
+FIVE_MIN_NS = 5 * ONE_MIN_NS
+TEN_MIN_NS = 10 * ONE_MIN_NS
+ONE_HOUR_NS = 60 * ONE_MIN_NS
+ONE_DAY_NS = 24 * ONE_HOUR_NS
+SELECTION_START_NS = 9 * ONE_HOUR_NS + 15 * ONE_MIN_NS   # 09:15 (time of day)
+SELECTION_END_NS = 9 * ONE_HOUR_NS + 25 * ONE_MIN_NS     # 09:25, inclusive
+
+DATA_FILES = sorted(glob.glob("data/dataNSE_*.csv"))   # dataNSE_YYYYMMDD: date order
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"   # Fixed NSE dump schema, skips format inference
+CSV_SCHEMA = {                      # Arrow column types of the NSE dump, skips type inference
+    "ticker": "string", "time": "timestamp[s]",
+    "open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "int64",
+}
+DATA_CACHE = "data/cache_{key}.parquet"   # Parsed CSVs, keyed by the CSVs' names, sizes and mtimes
+CACHE_VERSION = 1                         # Part of the cache key: bump when CSV_SCHEMA or compact_dtypes change
+MAX_WORKERS = os.cpu_count() or 1   # Days are simulated in parallel processes
+READ_WORKERS = os.cpu_count() or 1  # CSV files are parsed in parallel threads
 
 # ===============================
 # INDICATORS
 # ===============================
-def ema(series, span):
-    return series.ewm(span=span, adjust=False).mean()
+@njit(cache=True)
+def _ema_njit(x, offsets, spans):
+    """
+    EMAs of several spans over a jagged array (group k is x[offsets[k]:offsets[k + 1]]) in one
+    pass: out[i, s] is the EMA of span spans[s] at row i. Steps exactly like
+    ewm(span=span, adjust=False).mean(), so the output is bit-identical to pandas.
+    """
+    n_spans = len(spans)
+    out = np.empty((len(x), n_spans))
+    com = (spans - 1) / 2
+    alpha = 1.0 / (1.0 + com)    # pandas' span -> com -> alpha
+    old_wt_factor = 1.0 - alpha
+    weighted = np.empty(n_spans)
+    old_wt = np.empty(n_spans)
+    for k in range(len(offsets) - 1):
+        start, end = offsets[k], offsets[k + 1]
+        if end <= start:
+            continue
+        weighted[:] = x[start]
+        old_wt[:] = 1.0
+        out[start, :] = x[start]
+        for i in range(start + 1, end):
+            cur = x[i]
+            for s in range(n_spans):
+                w = weighted[s]
+                if w == w:
+                    ow = old_wt[s] * old_wt_factor[s]    # A NaN gap keeps decaying the old weight
+                    # pandas' irregular-interval update, only for com == 1
+                    new_wt = 1.0 - ow if com[s] == 1 else alpha[s]
+                    if cur == cur:
+                        # ewm skips the update when the value equals the running mean
+                        if w != cur:
+                            w = (ow * w + new_wt * cur) / (ow + new_wt)
+                        ow = 1.0
+                    old_wt[s] = ow
+                elif cur == cur:
+                    w = cur
+                weighted[s] = w
+                out[i, s] = w
+    return out
 
-def rsi_wilder(series, period=14):
+@njit(cache=True)
+def _rsi_wilder_njit(close, offsets, period):
     """
-    RSI using Wilder's Smoothing (Exponential Moving Average).
+    Single-pass Wilder RSI over a jagged array (group k is close[offsets[k]:offsets[k + 1]]).
+    Steps exactly like diff/where + ewm(alpha=1/period, min_periods=period, adjust=False).mean(),
+    so the output is bit-identical to the pandas formulation.
     """
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
-    
-    # Wilder's Smoothing: alpha = 1/n
-    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+    out = np.full(len(close), np.nan)
+    a = 1.0 / period
+    alpha = 1.0 / (1.0 + (1.0 - a) / a)    # pandas' alpha -> com -> alpha round trip
+    old_wt = 1.0 - alpha
+    for k in range(len(offsets) - 1):
+        start, end = offsets[k], offsets[k + 1]
+        avg_gain = 0.0    # The first diff is NaN, which where() maps to a 0 gain/loss
+        avg_loss = 0.0
+        for i in range(start, end):
+            if i > start:
+                delta = close[i] - close[i - 1]
+                gain = delta if delta > 0 else 0.0
+                loss = -delta if delta < 0 else 0.0
+                # ewm skips the update when the value equals the running mean
+                if avg_gain != gain:
+                    avg_gain = (old_wt * avg_gain + alpha * gain) / (old_wt + alpha)
+                if avg_loss != loss:
+                    avg_loss = (old_wt * avg_loss + alpha * loss) / (old_wt + alpha)
+            if i - start + 1 >= period:
+                if avg_loss == 0:
+                    out[i] = 100.0 if avg_gain > 0 else np.nan    # rs = inf / nan
+                else:
+                    out[i] = 100 - (100 / (1 + avg_gain / avg_loss))
+    return out
 
 # ===============================
 # METRICS
 # ===============================
+# Both take plain np.ndarray inputs
 def max_drawdown(equity):
-    roll_max = equity.cummax()
+    roll_max = np.maximum.accumulate(equity)
     dd = equity/roll_max - 1
     return dd.min()
 
 def sharpe_ratio(returns):
-    if returns.std() == 0: return 0
-    return (returns.mean() / returns.std()) * np.sqrt(252)
+    if len(returns) < 2: return np.nan    # Sample std undefined (pandas semantics)
+    std = returns.std(ddof=1)
+    if std == 0: return 0
+    return (returns.mean() / std) * np.sqrt(252)
+
+# ===============================
+# STOCK SELECTION
+# ===============================
+def top_turnover_by_day(data, n=10):
+    """
+    Top-n symbols by turnover (close * volume) in the 09:15 - 09:25 window, for every day in one pass.
+    Symbols are int ids: turnover is summed with one bincount over (day, symbol) cells.
+    Returns {date: [symbols]}.
+    """
+    ts_ns = _ts_ns(data["time"])
+    tod_ns = ts_ns % ONE_DAY_NS
+    in_window = (tod_ns >= SELECTION_START_NS) & (tod_ns <= SELECTION_END_NS)
+    # Code -1 is a missing ticker: groupby drops those rows, and they must not reach bincount
+    in_window &= data["symbol"].to_numpy() >= 0
+    window = data[in_window]
+    if window.empty:
+        return {}
+    
+    days, day_idx = np.unique(ts_ns[in_window] // ONE_DAY_NS, return_inverse=True)
+    symbols = window["symbol"].to_numpy()
+    n_symbols = int(symbols.max()) + 1
+    cells = day_idx * n_symbols + symbols
+    turnover = restore_prices(window["close"].to_numpy()) * window["volume"].to_numpy()
+    totals = np.bincount(cells, weights=turnover, minlength=len(days) * n_symbols).reshape(len(days), -1)
+    traded = np.bincount(cells, minlength=len(days) * n_symbols).reshape(len(days), -1) > 0
+    
+    # Stable order keeps the first symbol on ties, like nlargest. Untraded cells rank last (a
+    # traded symbol with zero volume still counts, as in groupby) and are then dropped
+    top = np.argsort(np.where(traded, -totals, np.inf), axis=1, kind="stable")[:, :n]
+    return {
+        day: row[traded[i, row]].tolist()
+        for i, (day, row) in enumerate(zip(days.astype("datetime64[D]").astype(object), top))
+    }
 
 # ===============================
 # ENGINE
 # ===============================
-def process_day(day_df, all_trades_list, current_capital):
+LONG, SHORT = 1, -1
+EXIT_REASONS = ("StopLoss", "TrailingSL", "Target", "EOD_SquareOff")
+EXIT_SL, EXIT_TRAIL, EXIT_TARGET, EXIT_EOD = 0, 1, 2, 3
+
+# One row per trade; symbol_id indexes the sorted symbol universe, exit_type indexes EXIT_REASONS.
+# qty / pnl / ret are filled in by size_positions.
+TRADE_DTYPE = np.dtype([
+    ("symbol_id", "i4"), ("direction", "i1"), ("exit_type", "i1"),
+    ("entry_ns", "i8"), ("entry_px", "f8"), ("exit_ns", "i8"), ("exit_px", "f8"),
+    ("pnl_ps", "f8"), ("qty", "i8"), ("pnl", "f8"), ("ret", "f8"),
+])
+
+def _ts_ns(times):
+    return np.asarray(times).astype("datetime64[ns]").view("i8")
+
+def _symbol_offsets(symbols):
+    """
+    Jagged layout of a symbol-contiguous column: block k is rows [offsets[k], offsets[k + 1]).
+    Returns (block symbols, offsets).
+    """
+    starts = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+    offsets = np.concatenate(([0], starts, [len(symbols)]))
+    return symbols[offsets[:-1]], offsets
+
+def _resample_bins(ts_ns, offsets, freq_ns):
+    """
+    Bins of resample(freq, origin="start", closed="right", label="right") for every block of a
+    jagged, time-sorted array, each anchored at its block's first timestamp. Empty bins are
+    skipped (as after dropna). Returns (bin labels, bin starts); bin b is rows [starts[b], starts[b + 1]).
+    """
+    origin = np.repeat(ts_ns[offsets[:-1]], np.diff(offsets))
+    labels = origin - (origin - ts_ns) // freq_ns * freq_ns    # Right edge: origin + ceil(dt / freq)
+    new_bin = np.ones(len(ts_ns), dtype=bool)
+    new_bin[1:] = labels[1:] != labels[:-1]
+    new_bin[offsets[:-1]] = True    # Never merge the last bin of one block with the next block
+    starts = np.flatnonzero(new_bin)
+    return labels[starts], starts
+
+@njit(cache=True)
+def _rolling_min_before(ts_ns, values, offsets, window_ns):
+    """
+    min(values) over [ts - window, ts) for every row of each block of a jagged, time-sorted
+    array, like rolling(window, closed="left").min(): NaN-skipping, NaN for an empty window.
+    """
+    out = np.full(len(values), np.nan)
+    for k in range(len(offsets) - 1):
+        lo = offsets[k]
+        for i in range(offsets[k], offsets[k + 1]):
+            while ts_ns[lo] < ts_ns[i] - window_ns:
+                lo += 1
+            for j in range(lo, i):
+                v = values[j]
+                if v == v and not (v >= out[i]):
+                    out[i] = v
+    return out
+
+@njit(cache=True)
+def _check_fill(m1_ts_ns, m1_open, m1_high, m1_low, signal_ns, direction, trigger_price):
+    """
+    Looks for the entry fill in the 10 minutes after the signal bar, [t+1, t+10].
+    Returns (fill index, entry price), or (-1, 0.0) if the trigger is never reached.
     """
-    Runs the backtest for a single day dataframe and APPENDS trades to all_trades_list.
-    Returns the updated current_capital.
+    lo = np.searchsorted(m1_ts_ns, signal_ns + ONE_MIN_NS)
+    hi = np.searchsorted(m1_ts_ns, signal_ns + TEN_MIN_NS, side="right")
+    fill_idx = -1
+    ep = 0.0
+    for j in range(lo, hi):
+        if direction == LONG:
+            if m1_high[j] >= trigger_price:
+                fill_idx = j
+                # Explicit Gap Logic: If Open > Trigger, Fill at Open. Else Trigger.
+                ep = m1_open[j] if m1_open[j] > trigger_price else trigger_price
+                break
+        else:
+            if m1_low[j] <= trigger_price:
+                fill_idx = j
+                # Explicit Gap Logic: If Open < Trigger, Fill at Open. Else Trigger.
+                ep = m1_open[j] if m1_open[j] < trigger_price else trigger_price
+                break
+    return fill_idx, ep
+
+@njit(cache=True)
+def _simulate_trade(m1_high, m1_low, m1_close, fill_idx, direction, ep, sl_pct, tgt_pct, trigger, step):
+    """
+    Manages a filled trade from the fill bar onwards: stop loss, target and trailing stop,
+    else square-off at the last close. Returns (exit index, exit price, exit reason code).
+    """
+    n1 = len(m1_high)
+    sl = ep * (1 - sl_pct) if direction == LONG else ep * (1 + sl_pct)
+    tgt = ep * (1 + tgt_pct) if direction == LONG else ep * (1 - tgt_pct)
+
+    exit_idx = n1 - 1
+    exit_px = m1_close[n1 - 1]
+    exit_reason = EXIT_EOD
+
+    # 1. STATIC PHASE: until trailing activates, SL and target are fixed, so the first
+    #    exit and the first activation bar are each found with a single vectorized scan.
+    #    On the activation bar the exit check still runs first, hence the `<=`.
+    highs = m1_high[fill_idx:]
+    lows = m1_low[fill_idx:]
+    if direction == LONG:
+        exit_hit = (lows <= sl) | (highs >= tgt)
+        trail_hit = highs >= ep * (1 + trigger)
+    else:
+        exit_hit = (highs >= sl) | (lows <= tgt)
+        trail_hit = lows <= ep * (1 - trigger)
+    first_exit = fill_idx + np.argmax(exit_hit) if exit_hit.any() else n1
+    first_trail = fill_idx + np.argmax(trail_hit) if trail_hit.any() else n1
+
+    if first_exit < n1 and first_exit <= first_trail:
+        exit_idx = first_exit
+        if (m1_low[exit_idx] <= sl) if direction == LONG else (m1_high[exit_idx] >= sl):
+            exit_px = sl
+            exit_reason = EXIT_SL
+        else:
+            exit_px = tgt
+            exit_reason = EXIT_TARGET
+
+    elif first_trail < n1:
+        # 2. TRAILING PHASE: the stop now ratchets bar by bar
+        if direction == LONG:
+            extreme_price = max(ep, m1_high[fill_idx:first_trail + 1].max())
+            sl = max(sl, extreme_price * (1 - step))
+        else:
+            extreme_price = min(ep, m1_low[fill_idx:first_trail + 1].min())
+            sl = min(sl, extreme_price * (1 + step))
+
+        # Direction-specialised loops; each bar folds both exit tests into one code
+        # (bit 0 = stop, bit 1 = target) so the common no-exit path takes a single branch
+        hit = 0
+        j = first_trail + 1
+        if direction == LONG:
+            while j < n1:
+                # CHECK EXIT FIRST (using existing SL)
+                hit = (m1_low[j] <= sl) | ((m1_high[j] >= tgt) << 1)
+                if hit:
+                    break
+                # UPDATE TRAILING (After verifying we survived this bar)
+                extreme_price = max(extreme_price, m1_high[j])
+                sl = max(sl, extreme_price * (1 - step))
+                j += 1
+        else:
+            while j < n1:
+                hit = (m1_high[j] >= sl) | ((m1_low[j] <= tgt) << 1)
+                if hit:
+                    break
+                extreme_price = min(extreme_price, m1_low[j])
+                sl = min(sl, extreme_price * (1 + step))
+                j += 1
+
+        if hit:
+            exit_idx = j
+            # The stop wins when both are hit on the same bar
+            if hit & 1:
+                exit_px = sl; exit_reason = EXIT_TRAIL
+            else:
+                exit_px = tgt; exit_reason = EXIT_TARGET
+
+    return exit_idx, exit_px, exit_reason
+
+@njit(cache=True)
+def _simulate_symbol_njit(m10_ts_ns, high, long_mask, signal_idx,
+                          m1_ts_ns, m1_open, m1_high, m1_low, m1_close, m1_low_5min,
+                          sl_pct, tgt_pct, trigger, step,
+                          out_entry_idx, out_exit_idx, out_entry_px, out_exit_px, out_dir, out_reason):
+    """
+    Bar-by-bar simulation of one symbol for one day on plain NumPy arrays.
+    Only the 10-minute bars listed in signal_idx are visited; long_mask picks their direction.
+    Trades are written to the out_* arrays (at least len(signal_idx) long, at most one trade
+    per signal bar) and their count is returned; indices point into the 1-minute arrays.
+    """
+    n1 = len(m1_ts_ns)
+    n = 0
+    if n1 == 0:
+        return n
+
+    # Signals are visited through a cursor into signal_idx: after each trade it jumps straight
+    # to the first signal at or after the exit time instead of stepping over the skipped ones
+    signal_ts_ns = m10_ts_ns[signal_idx]
+    p = np.searchsorted(signal_ts_ns, m1_ts_ns[0])
+
+    while p < len(signal_idx):
+        i = signal_idx[p]
+        p += 1
+        signal_ns = m10_ts_ns[i]
+
+        direction = LONG if long_mask[i] else SHORT
+
+        if direction == LONG:
+            trigger_price = high[i]
+        else:
+            # STRICT Short Window: [t-5, t-1], signal minute t excluded.
+            # m1_low_5min[k] already holds min(low) over [ts_k - 5min, ts_k).
+            k = np.searchsorted(m1_ts_ns, signal_ns)
+            if k < n1 and m1_ts_ns[k] == signal_ns:
+                trigger_price = m1_low_5min[k]
+            else:
+                # No bar at t itself (missing minute): reduce the window directly
+                lo = np.searchsorted(m1_ts_ns, signal_ns - FIVE_MIN_NS)
+                trigger_price = np.nan
+                for j in range(lo, k):
+                    if not (m1_low[j] >= trigger_price):
+                        trigger_price = m1_low[j]
+            if np.isnan(trigger_price):
+                continue
+
+        # --- CHECK FILL (Next 10 mins), then manage the trade ---
+        fill_idx, ep = _check_fill(m1_ts_ns, m1_open, m1_high, m1_low, signal_ns, direction, trigger_price)
+        if fill_idx < 0:
+            continue
+        exit_idx, exit_px, exit_reason = _simulate_trade(
+            m1_high, m1_low, m1_close, fill_idx, direction, ep, sl_pct, tgt_pct, trigger, step
+        )
+
+        out_entry_idx[n] = fill_idx
+        out_exit_idx[n] = exit_idx
+        out_entry_px[n] = ep
+        out_exit_px[n] = exit_px
+        out_dir[n] = direction
+        out_reason[n] = exit_reason
+        n += 1
+        p = np.searchsorted(signal_ts_ns, m1_ts_ns[exit_idx])
+
+    return n
+
+@njit(cache=True)
+def _simulate_day_njit(m10_offsets, m10_ts_ns, m10_high, long_mask, sig_offsets, signal_idx,
+                       m1_offsets, m1_ts_ns, m1_open, m1_high, m1_low, m1_close, m1_low_5min,
+                       sl_pct, tgt_pct, trigger, step,
+                       out_entry_idx, out_exit_idx, out_entry_px, out_exit_px, out_dir, out_reason):
+    """
+    Runs _simulate_symbol_njit for every symbol of the day. Inputs are jagged: symbol s owns
+    rows [offsets[s], offsets[s + 1]) of each array and writes its trades to the head of its
+    own out_* block [sig_offsets[s], sig_offsets[s + 1]). Serial on purpose: days already run
+    in one process per core, so extra threads would only oversubscribe them.
+    Returns the trade count per symbol; indices point into the day-level 1-minute arrays.
+    """
+    n_symbols = len(m10_offsets) - 1
+    counts = np.zeros(n_symbols, dtype=np.int64)
+    for s in range(n_symbols):
+        a, b = m10_offsets[s], m10_offsets[s + 1]
+        c, d = m1_offsets[s], m1_offsets[s + 1]
+        lo, hi = sig_offsets[s], sig_offsets[s + 1]
+        n = _simulate_symbol_njit(
+            m10_ts_ns[a:b], m10_high[a:b], long_mask[a:b], signal_idx[lo:hi] - a,
+            m1_ts_ns[c:d], m1_open[c:d], m1_high[c:d], m1_low[c:d], m1_close[c:d], m1_low_5min[c:d],
+            sl_pct, tgt_pct, trigger, step,
+            out_entry_idx[lo:hi], out_exit_idx[lo:hi], out_entry_px[lo:hi],
+            out_exit_px[lo:hi], out_dir[lo:hi], out_reason[lo:hi],
+        )
+        out_entry_idx[lo:lo + n] += c
+        out_exit_idx[lo:lo + n] += c
+        counts[s] = n
+    return counts
+
+def process_day(day_cols):
     """
-    day_df = day_df.sort_values("time").copy()
-    day_df = day_df.set_index("time")
+    Runs the backtest for a single day, given as a dict of column arrays (already reduced to the
+    day's selected stocks, see top_turnover_by_day) with symbols as ids into the sorted universe.
+    Returns its trades as a TRADE_DTYPE array sorted by entry time.
+    Capital-independent, so days can be simulated in parallel; sizing happens in size_positions.
+    """
+    if len(day_cols["time"]) == 0:
+        return np.empty(0, dtype=TRADE_DTYPE)
     
-    # 1. STOCK SELECTION (09:15 - 09:25)
-    sel_start = day_df.index[0].replace(hour=9, minute=15, second=0)
-    selection_window = day_df.between_time("09:15", "09:25")
+    # Day-level SoA columns in a jagged layout: every symbol is one contiguous, time-sorted
+    # block of rows. Built straight from the column arrays, no intermediate DataFrame.
+    # The day files already come in (symbol, time) order, so only sort when they do not.
+    sym_step = np.diff(day_cols["symbol"])
+    if (sym_step < 0).any() or ((sym_step == 0) & (day_cols["time"][1:] < day_cols["time"][:-1])).any():
+        order = np.lexsort((day_cols["time"], day_cols["symbol"]))
+        day_cols = {c: col[order] for c, col in day_cols.items()}
+    m1_symbols = day_cols["symbol"]
+    _, m1_offsets = _symbol_offsets(m1_symbols)
+    m1_ts_ns = _ts_ns(day_cols["time"])
+    m1_open, m1_high, m1_low, m1_close = (restore_prices(day_cols[c]) for c in PRICE_COLS)
     
-    turnover_calc = (
-        selection_window.assign(turnover=lambda x: x["close"] * x["volume"])
-        .groupby("symbol")["turnover"]
-        .sum()
-        .sort_values(ascending=False)
-        .head(10)
-    )
-    top_10 = turnover_calc.index.tolist()
-    day_df = day_df[day_df["symbol"].isin(top_10)]
+    # 1. INDICATORS (all selected symbols at once)
+    # Resample 10min (Signals) by bin index instead of per-symbol resample calls; origin is each
+    # symbol's first bar. Only high (long trigger) and close are used downstream.
+    m10_ts_all, m10_start = _resample_bins(m1_ts_ns, m1_offsets, TEN_MIN_NS)
+    m10_symbols = m1_symbols[m10_start]
+    symbols, m10_offsets = _symbol_offsets(m10_symbols)
+    m10_high_all = np.maximum.reduceat(m1_high, m10_start)
+    close = m1_close[np.append(m10_start[1:], len(m1_ts_ns)) - 1]
     
-    day_trades = [] # Temporary list for this day
+    # Resample 1h from the 10min bars: with the same origin (first bar, which is also the first
+    # 10min label) every hourly bin is exactly six 10min bins, so the 1-minute data is scanned once
+    h1_ts_all, h1_start = _resample_bins(m10_ts_all, m10_offsets, ONE_HOUR_NS)
+    _, h1_offsets = _symbol_offsets(m10_symbols[h1_start])
+    h1_close = close[np.append(h1_start[1:], len(close)) - 1]
     
-    for symbol, m1 in day_df.groupby("symbol"):
-        # Resample 10min (Signals)
-        m10 = m1.resample("10min", origin="start", closed="right", label="right").agg({
-            "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"
-        }).dropna()
-        
-        h1 = m1.resample("1h", origin="start", closed="right", label="right").agg({
-            "close": "last"
-        }).dropna()
-        h1["ema50"] = ema(h1["close"], 50)
-        
-        m10["ema3"] = ema(m10["close"], 3)
-        m10["ema10"] = ema(m10["close"], 10)
-        m10["rsi14"] = rsi_wilder(m10["close"], 14)
-        
-        m10 = pd.merge_asof(m10, h1["ema50"], left_index=True, right_index=True, direction="backward")
-        
-        valid_idx = m10.index[m10["ema10"].notna() & m10["rsi14"].notna()]
-        
-        active_trade = None
-        current_time_cursor = m1.index[0]
-        
-        for t_idx, row in m10.loc[valid_idx].iterrows():
-            signal_time = t_idx
-            if signal_time < current_time_cursor:
-                continue 
-            
-            if active_trade is not None:
-                continue 
-            
-            raw_ema50 = row["ema50"]
-            if pd.isna(raw_ema50):
-                continue
-            
-            long_signal = (row["ema3"] > row["ema10"]) and (row["rsi14"] > 60) and (row["close"] > raw_ema50)
-            short_signal = (row["ema3"] < row["ema10"]) and (row["rsi14"] < 30) and (row["close"] < raw_ema50)
-            
-            if not (long_signal or short_signal):
-                continue
-                
-            direction = "LONG" if long_signal else "SHORT"
-            trigger_price = 0.0
-            
-            if direction == "LONG":
-                trigger_price = row["high"]
-            else:
-                # STRICT Short Window: t-5 to t-1
-                # [t-5, t-1] is 5 candles. Exclude signal minute t.
-                subset_m1 = m1.loc[signal_time - timedelta(minutes=5) : signal_time - timedelta(minutes=1)] 
-                if subset_m1.empty: continue
-                trigger_price = subset_m1["low"].min()
-            
-            # --- CHECK FILL (Next 10 mins) ---
-            next_data = m1.loc[signal_time + timedelta(minutes=1) : signal_time + timedelta(minutes=10)]
-            
-            entry_filled = False
-            fill_info = {}
-            
-            for min_t, p_row in next_data.iterrows():
-                if direction == "LONG":
-                    if p_row["high"] >= trigger_price:
-                        entry_filled = True
-                        fill_info["time"] = min_t
-                        # Explicit Gap Logic: If Open > Trigger, Fill at Open. Else Trigger.
-                        fill_info["price"] = p_row["open"] if p_row["open"] > trigger_price else trigger_price
-                        break
-                else:
-                    if p_row["low"] <= trigger_price:
-                        entry_filled = True
-                        fill_info["time"] = min_t
-                        # Explicit Gap Logic: If Open < Trigger, Fill at Open. Else Trigger.
-                        fill_info["price"] = p_row["open"] if p_row["open"] < trigger_price else trigger_price
-                        break
-            
-            if entry_filled:
-                ep = fill_info["price"]
-                sl = ep * (1 - STOP_LOSS_PCT) if direction=="LONG" else ep * (1 + STOP_LOSS_PCT)
-                tgt = ep * (1 + TARGET_PCT) if direction=="LONG" else ep * (1 - TARGET_PCT)
-                
-                active_trade = {
-                    "symbol": symbol, "direction": direction,
-                    "entry_time": fill_info["time"], "entry_price": ep, 
-                    "sl": sl, "target": tgt,
-                    "trail_active": False, "extreme_price": ep
-                }
-                
-                trade_data = m1.loc[fill_info["time"]:] 
-                
-                exit_found = False
-                
-                for t_trade, row_trade in trade_data.iterrows():
-                    c_high = row_trade["high"]
-                    c_low = row_trade["low"]
-                    
-                    # 1. CHECK EXIT FIRST (using existing SL)
-                    exit_reason = None; exit_px = 0.0
-                    
-                    if direction == "LONG":
-                        if c_low <= active_trade["sl"]:
-                            exit_px = active_trade["sl"]
-                            exit_reason = "StopLoss" if not active_trade["trail_active"] else "TrailingSL"
-                        elif c_high >= active_trade["target"]:
-                            exit_px = active_trade["target"]
-                            exit_reason = "Target"
-                    else:
-                        if c_high >= active_trade["sl"]:
-                            exit_px = active_trade["sl"]
-                            exit_reason = "StopLoss" if not active_trade["trail_active"] else "TrailingSL"
-                        elif c_low <= active_trade["target"]:
-                            exit_px = active_trade["target"]
-                            exit_reason = "Target"
-                            
-                    if exit_reason:
-                         pnl_per_share = (exit_px - active_trade["entry_price"]) if direction=="LONG" else (active_trade["entry_price"] - exit_px)
-                         day_trades.append({
-                             "Date": t_trade.date(), "Stock": symbol, "Direction": direction,
-                             "EntryTime": active_trade["entry_time"], "EntryPrice": active_trade["entry_price"],
-                             "ExitTime": t_trade, "ExitPrice": exit_px,
-                             "PnL_Per_Share": pnl_per_share, "ExitType": exit_reason
-                         })
-                         current_time_cursor = t_trade
-                         active_trade = None
-                         exit_found = True
-                         break
-
-                    # 2. UPDATE TRAILING (After verifying we survived this bar)
-                    if direction == "LONG":
-                        active_trade["extreme_price"] = max(active_trade["extreme_price"], c_high)
-                        if not active_trade["trail_active"]:
-                            if active_trade["extreme_price"] >= active_trade["entry_price"] * (1 + TRAIL_TRIGGER):
-                                active_trade["trail_active"] = True
-                        if active_trade["trail_active"]:
-                            new_sl = active_trade["extreme_price"] * (1 - TRAIL_STEP)
-                            active_trade["sl"] = max(active_trade["sl"], new_sl)
-                    else:
-                        active_trade["extreme_price"] = min(active_trade["extreme_price"], c_low)
-                        if not active_trade["trail_active"]:
-                            if active_trade["extreme_price"] <= active_trade["entry_price"] * (1 - TRAIL_TRIGGER):
-                                active_trade["trail_active"] = True
-                        if active_trade["trail_active"]:
-                            new_sl = active_trade["extreme_price"] * (1 + TRAIL_STEP)
-                            active_trade["sl"] = min(active_trade["sl"], new_sl)
-                
-                # EOD Square Off 
-                if active_trade and not exit_found:
-                    last_row = trade_data.iloc[-1]
-                    exit_px = last_row["close"]
-                    pnl_per_share = (exit_px - active_trade["entry_price"]) if direction=="LONG" else (active_trade["entry_price"] - exit_px)
-                    day_trades.append({
-                         "Date": last_row.name.date(), "Stock": symbol, "Direction": direction,
-                         "EntryTime": active_trade["entry_time"], "EntryPrice": active_trade["entry_price"],
-                         "ExitTime": last_row.name, "ExitPrice": exit_px,
-                         "PnL_Per_Share": pnl_per_share, "ExitType": "EOD_SquareOff"
-                    })
-                    current_time_cursor = last_row.name
-                    active_trade = None
-
-    # POST-PROCESSING: Sort by Entry Time and Apply Dynamic Capital
-    day_trades.sort(key=lambda x: x["EntryTime"])
+    # The kernels take the per-symbol offsets directly; EMA3 and EMA10 share one pass
+    h1_ema50 = _ema_njit(h1_close, h1_offsets, np.array([50.0]))[:, 0]
+    ema3, ema10 = _ema_njit(close, m10_offsets, np.array([3.0, 10.0])).T
+    rsi14 = _rsi_wilder_njit(close, m10_offsets, 14)
+    
+    # H1 EMA50 as of each 10-min bar, for the whole day in one binary search. Per symbol both
+    # frames are binned from the same origin (first bar = first 10min label), so the latest 1h
+    # label <= t lies in hour bucket (t - origin) // 1h. Keys pack (symbol, hour bucket) into one
+    # sorted int64; each symbol's first hourly bar is bucket 0, so the last h1 key <= an m10 key
+    # always belongs to the same symbol.
+    sym_ids = np.arange(len(symbols))
+    origin_ns = m10_ts_all[m10_offsets[:-1]]
+    m10_sym = np.repeat(sym_ids, np.diff(m10_offsets))
+    h1_sym = np.repeat(sym_ids, np.diff(h1_offsets))
+    m10_key = (m10_sym << 32) + (m10_ts_all - origin_ns[m10_sym]) // ONE_HOUR_NS
+    h1_key = (h1_sym << 32) + (h1_ts_all - origin_ns[h1_sym]) // ONE_HOUR_NS
+    ema50 = h1_ema50[np.searchsorted(h1_key, m10_key, side="right") - 1]
+    
+    # 2. SIGNALS (vectorized over the day; NaN warm-up values of RSI/EMA50 compare False)
+    long_mask = (ema3 > ema10) & (rsi14 > 60) & (close > ema50)
+    short_mask = (ema3 < ema10) & (rsi14 < 30) & (close < ema50)
+    signal_idx = np.flatnonzero(long_mask | short_mask)
+    sig_offsets = np.searchsorted(signal_idx, m10_offsets)
     
-    for tr in day_trades:
+    # Short trigger source: min(low) over [ts - 5min, ts) for every 1-minute bar
+    m1_low_5min = _rolling_min_before(m1_ts_ns, m1_low, m1_offsets, FIVE_MIN_NS)
+    
+    # 3. SIMULATION: one kernel call over all symbols; each symbol may fill at most
+    #    one trade per signal bar, so the output buffers are sized by the signal count
+    n_sig = len(signal_idx)
+    out_entry_idx = np.empty(n_sig, dtype=np.int64)
+    out_exit_idx = np.empty(n_sig, dtype=np.int64)
+    out_entry_px = np.empty(n_sig, dtype=np.float64)
+    out_exit_px = np.empty(n_sig, dtype=np.float64)
+    out_dir = np.empty(n_sig, dtype=np.int8)
+    out_reason = np.empty(n_sig, dtype=np.int8)
+    counts = _simulate_day_njit(
+        m10_offsets, m10_ts_all, m10_high_all, long_mask, sig_offsets, signal_idx,
+        m1_offsets, m1_ts_ns,
+        m1_open, m1_high, m1_low, m1_close, m1_low_5min,
+        STOP_LOSS_PCT, TARGET_PCT, TRAIL_TRIGGER, TRAIL_STEP,
+        out_entry_idx, out_exit_idx, out_entry_px, out_exit_px, out_dir, out_reason,
+    )
+    
+    # Keep the filled head of every symbol's output block
+    sig_sizes = np.diff(sig_offsets)
+    keep = np.arange(n_sig) - np.repeat(sig_offsets[:-1], sig_sizes) < np.repeat(counts, sig_sizes)
+    entry_px, exit_px, dirs = out_entry_px[keep], out_exit_px[keep], out_dir[keep]
+    
+    day_trades = np.empty(len(entry_px), dtype=TRADE_DTYPE)
+    day_trades["symbol_id"] = np.repeat(symbols, sig_sizes)[keep]
+    day_trades["direction"] = dirs
+    day_trades["exit_type"] = out_reason[keep]
+    day_trades["entry_ns"] = m1_ts_ns[out_entry_idx[keep]]
+    day_trades["entry_px"] = entry_px
+    day_trades["exit_ns"] = m1_ts_ns[out_exit_idx[keep]]
+    day_trades["exit_px"] = exit_px
+    day_trades["pnl_ps"] = np.where(dirs == LONG, exit_px - entry_px, entry_px - exit_px)
+    return day_trades[np.argsort(day_trades["entry_ns"], kind="stable")]
+
+@njit(cache=True)
+def _apply_capital_njit(entry_px, pnl_ps, capital, risk_pct, sl_pct, out_qty, out_pnl, out_ret):
+    """
+    Sequential capital walk over trades in entry order: each quantity is sized from the capital
+    left by the trades before it. Fills out_qty / out_pnl / out_ret and returns the final capital.
+    """
+    for k in range(len(entry_px)):
         # Dynamic Sizing: 0.5% of CURRENT capital
-        risk_amt = current_capital * RISK_PER_TRADE
-        dist = tr["EntryPrice"] * STOP_LOSS_PCT
+        risk_amt = capital * risk_pct
+        dist = entry_px[k] * sl_pct
         qty = max(1, int(risk_amt / dist))
         
-        tr["Qty"] = qty
-        tr["PnL"] = tr["PnL_Per_Share"] * qty
-        tr["Return"] = tr["PnL"] / current_capital
+        pnl = pnl_ps[k] * qty
+        out_qty[k] = qty
+        out_pnl[k] = pnl
+        out_ret[k] = pnl / capital
         
         # Update Capital
-        current_capital += tr["PnL"]
-        
-        all_trades_list.append(tr)
-    
+        capital += pnl
+    return capital
+
+def size_positions(day_trades, all_trades_list, current_capital):
+    """
+    Applies dynamic capital to one day's trades (in entry order), filling qty / pnl / ret,
+    and APPENDS them to all_trades_list. Returns the updated current_capital.
+    """
+    qty = np.empty(len(day_trades), dtype=np.int64)
+    pnl = np.empty(len(day_trades), dtype=np.float64)
+    ret = np.empty(len(day_trades), dtype=np.float64)
+    current_capital = _apply_capital_njit(
+        day_trades["entry_px"].copy(), day_trades["pnl_ps"].copy(), float(current_capital),
+        RISK_PER_TRADE, STOP_LOSS_PCT, qty, pnl, ret,
+    )
+    day_trades["qty"] = qty
+    day_trades["pnl"] = pnl
+    day_trades["ret"] = ret
+    all_trades_list.append(day_trades)
     return current_capital
 
+def trade_log(trades, universe):
+    """
+    Builds the trade_log.csv frame from a TRADE_DTYPE array in one shot.
+    """
+    exit_time = pd.to_datetime(trades["exit_ns"])
+    return pd.DataFrame({
+        "Date": exit_time.date,
+        "Stock": universe[trades["symbol_id"]],
+        "Direction": np.where(trades["direction"] == LONG, "LONG", "SHORT"),
+        "EntryTime": pd.to_datetime(trades["entry_ns"]),
+        "EntryPrice": trades["entry_px"],
+        "Qty": trades["qty"],
+        "ExitTime": exit_time,
+        "ExitPrice": trades["exit_px"],
+        "PnL": trades["pnl"],
+        "Return": trades["ret"],
+        "ExitType": np.array(EXIT_REASONS)[trades["exit_type"]],
+    })
+
+# ===============================
+# DATA
+# ===============================
+def read_day_csv(path):
+    if HAS_PYARROW:
+        # Multi-threaded Arrow parser with a fixed schema, timestamps parsed natively
+        convert = pa_csv.ConvertOptions(column_types=CSV_SCHEMA)
+        return pa_csv.read_csv(path, convert_options=convert).to_pandas()
+    d = pd.read_csv(path)
+    d["time"] = pd.to_datetime(d["time"], format=TIME_FORMAT, cache=True)
+    return d
+
+def compact_dtypes(data):
+    """
+    Stores prices as float32 and volume as int32 when nothing is lost: every price must come
+    back exactly through restore_prices() and every volume must fit in int32. Tickers become
+    a category (sorted categories). Halves the memory of the full multi-day frame, the Parquet
+    cache and worker IPC.
+    """
+    prices = data[PRICE_COLS].to_numpy(np.float64)
+    prices_f32 = prices.astype(np.float32)
+    if np.array_equal(restore_prices(prices_f32), prices):
+        data[PRICE_COLS] = prices_f32
+    if data["volume"].between(np.iinfo(np.int32).min, np.iinfo(np.int32).max).all():
+        data["volume"] = data["volume"].astype(np.int32)
+    data["ticker"] = data["ticker"].astype("category")
+    return data
+
+def restore_prices(prices):
+    """
+    float64 prices for computation; undoes the float32 storage rounding of compact_dtypes().
+    Only float32 prices are rounded: data kept as float64 (not on the tick) passes unchanged.
+    """
+    if prices.dtype == np.float32:
+        return prices.astype(np.float64).round(PRICE_DECIMALS)
+    return prices.astype(np.float64, copy=False)
+
+def _cache_path(files):
+    """
+    Parquet cache file of exactly this set of CSVs: any added, removed or modified file
+    changes the key, and so does a new CACHE_VERSION.
+    """
+    digest = hashlib.sha1(f"v{CACHE_VERSION}\n".encode())
+    for f in files:
+        st = os.stat(f)
+        digest.update(f"{f}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return DATA_CACHE.format(key=digest.hexdigest()[:16])
+
+def load_data(files):
+    """
+    Loads and concatenates the day CSVs. With pyarrow available the result is cached
+    as zstd-compressed Parquet and reused until the set of CSVs changes; nothing is cached
+    when a file could not be read.
+    """
+    cache = _cache_path(files) if HAS_PYARROW and files else None
+    if cache and os.path.exists(cache):
+        return pd.read_parquet(cache)
+    
+    # Parsing releases the GIL, so the files are read concurrently (results kept in file order)
+    raw_dfs = []
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        futures = [executor.submit(read_day_csv, f) for f in files]
+        for f, future in zip(files, futures):
+            try:
+                raw_dfs.append(future.result())
+            except Exception as e:
+                print(f"Skipping {f}: {e}")
+    
+    if not raw_dfs:
+        return None
+    
+    data = compact_dtypes(pd.concat(raw_dfs, ignore_index=True))
+    # Only a complete read is cached: a skipped file would otherwise stay missing on every rerun
+    if cache and len(raw_dfs) == len(files):
+        for stale in glob.glob(DATA_CACHE.format(key="*") + "*"):
+            os.remove(stale)
+        # Write under a temporary name, so an interrupted write never leaves a truncated cache
+        tmp = cache + ".tmp"
+        data.to_parquet(tmp, index=False, compression="zstd")
+        os.replace(tmp, cache)
+    return data
+
+def day_slices(data):
+    """
+    Splits a frame whose days are contiguous row blocks (one file per day) into
+    [(date, day frame)] in date order, cutting at the day boundaries of the int64 timestamps
+    instead of grouping by a per-row date object.
+    """
+    if data.empty:
+        return []
+    day_ns = _ts_ns(data["time"]) // ONE_DAY_NS
+    if (np.diff(day_ns) < 0).any():
+        # Days out of order: a stable sort keeps each day's own row order
+        order = np.argsort(day_ns, kind="stable")
+        data, day_ns = data.iloc[order], day_ns[order]
+    starts = np.flatnonzero(np.diff(day_ns, prepend=day_ns[0] - 1))
+    ends = np.append(starts[1:], len(day_ns))
+    return [(np.datetime64(int(day_ns[a]), "D").item(), data.iloc[a:b]) for a, b in zip(starts, ends)]
+
 # ===============================
 # MAIN
 # ===============================
 if __name__ == "__main__":
-    raw_dfs = []
     print("Loading data...")
-    for f in DATA_FILES:
-        try:
-            d = pd.read_csv(f)
-            d["time"] = pd.to_datetime(d["time"])
-            raw_dfs.append(d)
-        except Exception as e:
-            print(f"Skipping {f}: {e}")
+    full_data = load_data(DATA_FILES)
     
-    if not raw_dfs:
+    if full_data is None:
         print("No data loaded.")
         exit()
 
-    full_data = pd.concat(raw_dfs).sort_values(["time", "ticker"])
+    # No global sort: each day file is one contiguous block (see day_slices) and process_day
+    # only sorts its own slice if needed
     full_data = full_data.rename(columns={"ticker": "symbol"})
 
+    # From here on symbols are int32 ids into the sorted universe (same order as the names):
+    # the category codes from compact_dtypes
+    universe = full_data["symbol"].cat.categories.to_numpy()
+    full_data["symbol"] = full_data["symbol"].cat.codes.astype(np.int32)
     all_trades = []
     current_capital = BASE_CAPITAL
     
     print("Starting backtest loop...")
-    for day, group in full_data.groupby(full_data["time"].dt.date):
-        print(f"Processing {day} | Start Capital: {current_capital:.2f}")
-        try:
-            current_capital = process_day(group, all_trades, current_capital)
-        except Exception as e:
-            print(f"Error on {day}: {e}")
+    # STOCK SELECTION once for all days; workers only receive the selected stocks
+    top_by_day = top_turnover_by_day(full_data)
+    # Days travel to the workers as dicts of plain arrays, which pickle far cheaper than frames
+    day_groups = []
+    for day, group in day_slices(full_data):
+        selected = group[group["symbol"].isin(top_by_day.get(day, []))]
+        day_groups.append((day, {c: col.to_numpy() for c, col in selected.items()}))
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Trade generation runs in parallel; capital is then walked forward day by day
+        futures = [executor.submit(process_day, day_cols) for _, day_cols in day_groups]
+        for (day, _), future in zip(day_groups, futures):
+            print(f"Processing {day} | Start Capital: {current_capital:.2f}")
+            try:
+                day_trades = future.result()
+            except Exception as e:
+                print(f"Error on {day}: {e}")
+                continue
+            current_capital = size_positions(day_trades, all_trades, current_capital)
 
     # RESULTS
-    if all_trades:
-        trades_df = pd.DataFrame(all_trades)
-        trades_df = trades_df.sort_values("EntryTime")
-        cols = ["Date","Stock","Direction","EntryTime","EntryPrice","Qty","ExitTime","ExitPrice","PnL","Return","ExitType"]
-        trades_df = trades_df[cols]
+    trades = np.concatenate(all_trades) if all_trades else np.empty(0, dtype=TRADE_DTYPE)
+    if len(trades):
+        trades_df = trade_log(trades, universe).sort_values("EntryTime")
         
         trades_df.to_csv("trade_log.csv", index=False)
         print("\nSaved trade_log.csv")
@@ -297,10 +743,12 @@ if __name__ == "__main__":
         # Metrics
         final_capital = current_capital
         total_return_pct = (final_capital - BASE_CAPITAL) / BASE_CAPITAL
-        win_rate = (trades_df["PnL"] > 0).mean() * 100
-        trades_df["Equity"] = BASE_CAPITAL + trades_df["PnL"].cumsum()
-        dd = max_drawdown(trades_df["Equity"])
-        sharpe = sharpe_ratio(trades_df["Return"]) 
+        pnl = trades_df["PnL"].to_numpy(np.float64)
+        returns = trades_df["Return"].to_numpy(np.float64)
+        win_rate = (pnl > 0).mean() * 100
+        equity = BASE_CAPITAL + np.cumsum(pnl)
+        dd = max_drawdown(equity)
+        sharpe = sharpe_ratio(returns)
         
         print("\n===== PRECISION PERFORMANCE =====")
         print(f"Trades: {len(trades_df)}")